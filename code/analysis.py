@@ -2,50 +2,124 @@
 Analyze the results obtained from the experiments
 """
 
+import io
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 import seaborn as sns
-from scipy.interpolate import BSpline, make_interp_spline
 
-from os.path import join
+from os.path import join, isfile, getmtime
 
 DATA_DIR = 'data'
 
 DATA_FILE = join(DATA_DIR, 'episode_rewards_train_15198.csv')
-# dtypes = {'episode': int, 'waiting_time': np.float32, 'boarding_time': np.float32}
-# passengers = pd.read_csv(DATA_FILE, dtype=dtypes, sep=',', low_memory=True)
-# passengers = pd.read_csv(DATA_FILE, dtype=dtypes)
+# single precision is plenty for times in seconds and halves the memory the statistics pass over
+PASSENGER_DTYPES = {'episode': np.int32, 'waiting_time': np.float32, 'boarding_time': np.float32}
 # data = pd.read_csv(DATA_FILE, header=None)
 # print(data.head())
 
+
+def load_passengers(filename, cache=False):
+    """
+    Load passenger statistics file using compact column types.
+
+    If `cache' is True, the parsed frame is cached in a binary file next to the csv file, which is
+    reused for as long as the csv file has not been modified since.
+    """
+    if not cache:
+        return pd.read_csv(filename, dtype=PASSENGER_DTYPES, engine='c')
+    cache_file = filename + '.pkl'
+    if isfile(cache_file) and getmtime(cache_file) >= getmtime(filename):
+        return pd.read_pickle(cache_file)
+    passengers = pd.read_csv(filename, dtype=PASSENGER_DTYPES, engine='c')
+    passengers.to_pickle(cache_file)
+    return passengers
+
+
+def add_time_columns(passengers, threshold=60):
+    """
+    Add system time and waiting time threshold columns to the passenger frame.
+
+    Both columns are computed from the same waiting time array into preallocated output arrays, so
+    no temporary columns are created.
+    """
+    waiting_time = passengers['waiting_time'].to_numpy()
+    system_time = np.empty_like(waiting_time)
+    above_threshold = np.empty(len(waiting_time), dtype=bool)
+    np.add(waiting_time, passengers['boarding_time'].to_numpy(), out=system_time)
+    np.greater(waiting_time, threshold, out=above_threshold)
+    passengers['system_time'] = system_time
+    passengers['threshold'] = above_threshold
+    return passengers
+
+
+def episode_stats(passengers, min_passengers=50):
+    """
+    Return mean passenger statistics per episode.
+
+    Episodes with `min_passengers' or fewer passengers are left out. Filtering is done with a
+    group size mask on the frame itself, so only one groupby aggregation is needed.
+    """
+    sizes = passengers.groupby('episode')['waiting_time'].transform('size')
+    return passengers[sizes > min_passengers].groupby('episode', sort=False).mean()
+
+
 fig = plt.figure()
 ax1 = fig.add_subplot(1, 1, 1)
 
+# rows already parsed are kept in memory, only bytes appended since the last frame are read
+state = {'offset': 0, 'y': np.empty(0, dtype=np.float32), 'line': ax1.plot([], [])[0]}
+
+
 def animate(i):
-    data = pd.read_csv(DATA_FILE, header=None)
-    ax1.clear()
+    line = state['line']
+    with open(DATA_FILE, 'rb') as f:
+        f.seek(state['offset'])
+        buf = f.read()
+    # only parse complete rows, a partially written row is picked up next frame
+    end = buf.rfind(b'\n') + 1
+    if end == 0:
+        return (line,)
+    state['offset'] += end
+    new_rows = pd.read_csv(io.BytesIO(buf[:end]), header=None, usecols=[1], dtype=np.float32, engine='c')
+    new_y = new_rows[1].values
+    state['y'] = y = np.concatenate((state['y'], new_y))
+    line.set_data(np.arange(len(y)), y)
+
+    # blitting only redraws the line, so the limits are grown in steps and the whole figure is
+    # redrawn only when the new data no longer fits
+    ymin, ymax = ax1.get_ylim()
+    if len(y) > ax1.get_xlim()[1] or new_y.min() < ymin or new_y.max() > ymax:
+        margin = 0.1 * (y.max() - y.min()) or 1
+        ax1.set_xlim(0, 2 * len(y))
+        ax1.set_ylim(y.min() - margin, y.max() + margin)
+        fig.canvas.draw()
+    return (line,)
 
-    plt.plot(data[1])
 
-ani = animation.FuncAnimation(fig, animate, interval=1000)
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p", "--passengers", help='summarize this passenger statistics file per episode')
+    parser.add_argument("--cache", action='store_true', help='cache parsed passenger statistics next to the csv file')
+    args = parser.parse_args()
+
+    if args.passengers:
+        passengers = add_time_columns(load_passengers(args.passengers, cache=args.cache))
+        stats = episode_stats(passengers)
+        print(stats)
+        stats.to_csv('stats.csv')
+    else:
+        ani = animation.FuncAnimation(fig, animate, interval=1000, blit=True)
+        plt.show()
 
 # plt.plot(data[1])
-plt.show()
 # x = passengers.info(memory_usage='deep')
 # print(x)
-# passengers['system_time'] = passengers['waiting_time'] + passengers['boarding_time']
-# passengers['threshold'] = passengers['waiting_time'] > 60
 # print(passengers.head())
 # print(passengers.describe())
-
-# grouped = passengers.groupby('episode')#.filter(lambda x: len(x) > 50).groupby('episode')
-# print(grouped
-# print(grouped.groups)
-# stats = grouped.aggregate(np.mean)
-# print(stats)
-# stats.to_csv('stats.csv')
 # plt.plot(passengers['waiting_time'])
 # plt.show()
 # plt.figure()
@@ -1,6 +1,7 @@
 """
 Define constants to be used in all files.
 """
+import os
 
 # building constants
 NUM_FLOORS = 5
@@ -49,7 +50,9 @@ NUM_EPS_UPDATE = 5
 GENERAL_EPS = 0.0001
 
 LOG_DIR = 'logs'
-MAP_CONST_STR = {-1: 'DOWN', 0: 'STOPPED', 1: 'UP', 2: 'IDLE', 3: 'ACCELERATING',
-                 4: 'FULL_SPEED_DECELERATING', 5: 'ACCEL_DECELERATING', 6: 'FULL_SPEED',
-                 7: 'BOARDING', 8: 'STOP', 9: 'CONTINUE', 10: 'NO_ACTION', 11: 'MOVE_UP',
-                 12: 'MOVE_DOWN', 13: 'DONE_BOARDING'}
\ No newline at end of file
+# run with FAST_SIM=1 to only log warnings, which skips the per event info logging
+FAST_SIM = os.environ.get('FAST_SIM') == '1'
+# names of the elevator constants DOWN (-1) up to DONE_BOARDING (13), constant k is found at index k + 1
+MAP_CONST_STR = ('DOWN', 'STOPPED', 'UP', 'IDLE', 'ACCELERATING', 'FULL_SPEED_DECELERATING',
+                 'ACCEL_DECELERATING', 'FULL_SPEED', 'BOARDING', 'STOP', 'CONTINUE', 'NO_ACTION',
+                 'MOVE_UP', 'MOVE_DOWN', 'DONE_BOARDING')
\ No newline at end of file
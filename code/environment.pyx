@@ -7,11 +7,14 @@ import constants as const
 # other modules
 import logging
 import csv
-import random
-import math
 from abc import ABC, abstractmethod
 from os.path import join
-from io import StringIO
+from collections import deque
+from itertools import islice, chain
+from libc.math cimport cos
+cimport cython
+
+import numpy as np
 
 # from time import time, sleep
 from qlearningAgents import ElevatorQAgent
@@ -19,7 +22,7 @@ from heuristicAgents import RandomAgent, BestFirstAgent
 import events
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+logger.setLevel(logging.WARNING if const.FAST_SIM else logging.INFO)
 formatter = logging.Formatter('%(levelname)s:%(name)s:%(message)s')
 file_handler = logging.FileHandler(join(const.LOG_DIR, 'environment.log'), mode='w')
 file_handler.setLevel(logging.DEBUG)
@@ -27,6 +30,26 @@ file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 
 
+cdef inline int _popcount(unsigned long long x) noexcept nogil:
+    """
+    Return number of set bits in x.
+    """
+    cdef int count = 0
+    while x:
+        x &= x - 1
+        count += 1
+    return count
+
+
+# _ABOVE_MASKS[i] has the bits of all floors above floor i set, _BELOW_MASKS[i] those below floor i
+cdef unsigned long long _ABOVE_MASKS[64]
+cdef unsigned long long _BELOW_MASKS[64]
+cdef int _level
+for _level in range(64):
+    _BELOW_MASKS[_level] = (<unsigned long long>1 << _level) - 1
+    _ABOVE_MASKS[_level] = ~(_BELOW_MASKS[_level] | <unsigned long long>1 << _level)
+
+
 cdef class Environment:
     """
     Combines all separate parts of an environment.
@@ -43,6 +66,18 @@ cdef class Environment:
         floor i can be accessed by floors[i], where ground floor is floor[0]
     elevators : list
         elevator i can be accessed by elevators[i]
+    floor_positions : ndarray
+        vertical position in meters of every floor, floor_positions[i] belongs to floors[i]
+    down_mask : int
+        bit i is set if the down hall button on floor i is on
+    up_mask : int
+        bit i is set if the up hall button on floor i is on
+    motion_state : ndarray
+        motion state of all elevators stored column-wise, rows are acceleration, velocity,
+        position and reference time. column i belongs to elevators[i]
+    elevator_modes : ndarray
+        status and direction of all elevators stored column-wise, rows are status and direction.
+        column i belongs to elevators[i]
     last_accumulator_event_time :
         time when a passenger arrival, passenger transfer or elevator control event occurred.
         necessary for updating accumulated costs for reinforcement agents
@@ -54,19 +89,35 @@ cdef class Environment:
     """
     cdef public int num_floors, num_elevators
     cdef public float last_accumulator_event_time
-    cdef public object floors, elevators, passenger_times, traffic_profile
+    cdef public object floors, elevators, passenger_times, traffic_profile, motion_state, elevator_modes
     cdef public bint write_files
+    cdef public unsigned long long down_mask, up_mask
+    cdef public object floor_positions
+    cdef float[::1] _floor_positions
+    # button tuples handed out by get_buttons and the masks they were built from
+    cdef tuple _down_buttons, _up_buttons
+    cdef unsigned long long _down_buttons_mask, _up_buttons_mask
 
     def __init__(self, int num_floors=5, int num_elevators=1, object traffic_profile='DownPeak',
                  float interfloor=0.1, **args):
+        seed = args['seed'] if args.get('use_seed') else None
         if traffic_profile == 'DownPeak':
-            self.traffic_profile = DownPeak(num_floors, interfloor)
+            self.traffic_profile = DownPeak(num_floors, interfloor, seed)
         else:
-            self.traffic_profile = DownPeak(num_floors, interfloor)
+            self.traffic_profile = DownPeak(num_floors, interfloor, seed)
 
+        assert num_floors <= 64, 'hall button state of at most 64 floors fits in a button mask'
         self.num_floors = num_floors
         self.num_elevators = num_elevators
-        self.floors = [Floor(level) for level in range(self.num_floors)]
+        self.down_mask = 0
+        self.up_mask = 0
+        self._down_buttons = self._up_buttons = (False,) * num_floors
+        self._down_buttons_mask = self._up_buttons_mask = 0
+        self.floor_positions = (const.FLOOR_HEIGHT * np.arange(self.num_floors)).astype(np.float32)
+        self._floor_positions = self.floor_positions
+        self.floors = [Floor(level, self) for level in range(self.num_floors)]
+        self.motion_state = np.zeros((4, self.num_elevators), dtype=np.float32)
+        self.elevator_modes = np.zeros((2, self.num_elevators), dtype=np.int8)
         self.elevators = [ElevatorState(environment=self, index=i, **args) for i in range(self.num_elevators)]
         self.last_accumulator_event_time = 0
         self.passenger_times = []
@@ -96,15 +147,41 @@ cdef class Environment:
         """
         Update environment state.
         """
-        for elevator_state in self.elevators:
-            elevator_state.update(simulator)
-
-    def observe(self, simulator):
-        """
-        Check state of the environment and see if new events should be made.
-        """
-        for elevator_state in self.elevators:
-            elevator_state.observe(simulator)
+        cdef signed char[:, ::1] modes = self.elevator_modes
+        cdef int i, status
+        self.step_motion(simulator)
+        for i in range(self.num_elevators):
+            # standing elevators neither move nor cross floors
+            status = modes[0, i]
+            if status == _IDLE or status == _BOARDING:
+                continue
+            self.elevators[i].update(simulator)
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef step_motion(self, object simulator):
+        """
+        Advance motion state of all elevators by a single time step.
+
+        The motion of all elevators is stepped without holding the GIL.
+        """
+        cdef float[:, ::1] state = self.motion_state
+        cdef signed char[:, ::1] modes = self.elevator_modes
+        cdef double now = simulator.now()
+        cdef double dt = simulator.time_step
+        cdef float t
+        cdef int i, num_elevators = self.num_elevators
+        cdef long ticks = simulator.ticks
+        with nogil:
+            for i in range(num_elevators):
+                t = now - state[3, i]
+                _motion_step(&state[0, i], &state[1, i], &state[2, i], modes[0, i], modes[1, i], t, dt)
+
+        # log motion once per simulated second, counted in whole steps
+        if ticks % <long>_STEPS_PER_SECOND == 0 and logger.isEnabledFor(logging.DEBUG):
+            for i in range(num_elevators):
+                logger.debug('time:%.3f:elevator %d motion - acc:%.3f vel:%.3f pos:%.3f', now, i,
+                             state[0, i], state[1, i], state[2, i])
 
     cpdef get_learning_state(self, elevator_state):
         """
@@ -131,11 +208,52 @@ cdef class Environment:
             learning state of the elevator as defined above
         """
         es = elevator_state
-        return (self.num_hall_calls(es.floor, down=True, above=True, down_up=False),
-                self.num_hall_calls(es.floor, down=False, above=True, down_up=False),
-                self.num_hall_calls(es.floor, down=True, above=False, down_up=False),
-                self.num_hall_calls(es.floor, down=False, above=False, down_up=False),
-                es.num_car_calls(), es.floor, es.direction)
+        return self.hall_call_counts(es.floor) + (es.num_car_calls(), es.floor, es.direction)
+
+    cpdef set_button(self, int level, bint down, bint state):
+        """
+        Turn the up or down hall button of a floor on or off in the button masks.
+
+        Parameters
+        ----------
+        level : int
+            floor of the button
+        down : bool
+            If true, set the down button, the up button otherwise
+        state : bool
+            True if the button turns on, False if it turns off
+        """
+        cdef unsigned long long bit = <unsigned long long>1 << level
+        cdef unsigned long long mask = self.down_mask if down else self.up_mask
+        mask = (mask | bit) if state else (mask & ~bit)
+        if down:
+            self.down_mask = mask
+        else:
+            self.up_mask = mask
+
+    cdef tuple _button_tuple(self, unsigned long long mask):
+        cdef int level
+        return tuple([bool(mask >> level & 1) for level in range(self.num_floors)])
+
+    def get_down_buttons(self):
+        """
+        Return down button state of all floors as a tuple, element i belongs to floor i.
+        """
+        # the tuple is only rebuilt after a down button has changed
+        if self.down_mask != self._down_buttons_mask:
+            self._down_buttons = self._button_tuple(self.down_mask)
+            self._down_buttons_mask = self.down_mask
+        return self._down_buttons
+
+    def get_up_buttons(self):
+        """
+        Return up button state of all floors as a tuple, element i belongs to floor i.
+        """
+        # the tuple is only rebuilt after an up button has changed
+        if self.up_mask != self._up_buttons_mask:
+            self._up_buttons = self._button_tuple(self.up_mask)
+            self._up_buttons_mask = self.up_mask
+        return self._up_buttons
 
     def get_buttons(self, bint down=False, bint down_up=False):
         """
@@ -153,21 +271,25 @@ cdef class Environment:
         tuple
             every element i contains the button state of floor i
         """
-        all_buttons = tuple(floor.get_buttons() for floor in self.floors)
         if down_up:
-            return tuple(buttons[0] for buttons in all_buttons), tuple(buttons[1] for buttons in all_buttons)
+            return self.get_down_buttons(), self.get_up_buttons()
         if down:
-            return tuple(buttons[0] for buttons in all_buttons)
-        return tuple(buttons[1] for buttons in all_buttons)
+            return self.get_down_buttons()
+        return self.get_up_buttons()
+
+    cpdef float floor_distance(self, int level, float pos):
+        """
+        Return vertical distance in meters between position pos and floor level.
+        """
+        return abs(pos - self._floor_positions[level])
 
     def no_buttons_pressed(self):
         """
         Return True if no buttons are pressed i.e. no waiting passengers
         """
-        buttons_down, buttons_up = self.get_buttons(down_up=True)
-        return sum(buttons_down) + sum(buttons_up) == 0
+        return self.down_mask == 0 and self.up_mask == 0
 
-    def num_hall_calls(self, level, down=False, above=False, down_up=True):
+    def num_hall_calls(self, int level, bint down=False, bint above=False, bint down_up=True):
         """
         Return number of hall calls relative to a floor level.
 
@@ -187,21 +309,39 @@ cdef class Environment:
         int
             number of up/down hall calls above/below elevator
         """
-        buttons = self.get_buttons(down, down_up)
+        cdef unsigned long long floors = _ABOVE_MASKS[level] if above else _BELOW_MASKS[level]
+
         if down_up:
-            if above:
-                return sum(buttons[0][level + 1:]) + sum(buttons[1][level + 1:])
-            return sum(buttons[0][:level]) + sum(buttons[1][:level])
+            return _popcount(self.down_mask & floors) + _popcount(self.up_mask & floors)
+        if down:
+            return _popcount(self.down_mask & floors)
+        return _popcount(self.up_mask & floors)
+
+    cpdef tuple hall_call_counts(self, int level):
+        """
+        Return number of down and up hall calls above and below a floor level at once.
 
-        if above:
-            return sum(buttons[level + 1:])
+        Parameters
+        ----------
+        level : int
+            floor to look around
 
-        return sum(buttons[:level])
+        Returns
+        -------
+        tuple
+            number of down hall calls above, up hall calls above, down hall calls below and up hall
+            calls below the floor, in that order
+        """
+        cdef unsigned long long above = _ABOVE_MASKS[level], below = _BELOW_MASKS[level]
+        return (_popcount(self.down_mask & above), _popcount(self.up_mask & above),
+                _popcount(self.down_mask & below), _popcount(self.up_mask & below))
 
-    def is_hall_call(self, level, down=False, above=False, down_up=True):
+    cpdef bint is_hall_call(self, int level, bint down=False, bint above=False, bint down_up=True):
         """
         Return True if there is at least one hall call in the specified direction.
 
+        Only tests the button masks for any set bit, the hall calls are not counted.
+
         Parameters
         ----------
         level : int
@@ -215,10 +355,16 @@ cdef class Environment:
 
         Returns
         -------
-        int
-            number of up/down hall calls above/below elevator
+        bool
+            True if there is an up/down hall call above/below the floor
         """
-        return self.num_hall_calls(level, down, above, down_up) > 0
+        cdef unsigned long long floors = _ABOVE_MASKS[level] if above else _BELOW_MASKS[level]
+
+        if down_up:
+            return ((self.down_mask | self.up_mask) & floors) != 0
+        if down:
+            return (self.down_mask & floors) != 0
+        return (self.up_mask & floors) != 0
 
     def get_passengers_system(self):
         """
@@ -240,10 +386,8 @@ cdef class Environment:
         list
             passenger objects representing passengers waiting
         """
-        result = []
-        for floor in self.floors:
-            result += floor.all_passengers()
-        return result
+        return list(chain.from_iterable(queue for floor in self.floors
+                                        for queue in (floor.passengers_down, floor.passengers_up)))
 
     def get_passengers_boarded(self):
         """
@@ -254,10 +398,8 @@ cdef class Environment:
         list
             passenger objects representing passengers in elevators
         """
-        result = []
-        for elevator in self.elevators:
-            result += elevator.passengers_as_list()
-        return result
+        return list(chain.from_iterable(passengers for elevator in self.elevators
+                                        for passengers in elevator.passengers))
 
     cdef get_possible_actions(self, object elevator_state):
         """
@@ -276,106 +418,87 @@ cdef class Environment:
             actions which be taken by the agent
         """
         cdef int status, num_pass_up, num_pass_down, amount, stop_target
-        status = elevator_state.status
+        status = elevator_state._status
 
-        # cannot take new action when action is still in progress or no passengers in system
-        if (elevator_state.is_action_in_progress() or status == ElevatorState.BOARDING or
-            (self.no_buttons_pressed() and elevator_state.is_empty())):
+        # cannot take new action when action is still in progress or no passengers in system.
+        # cheapest checks first, the button state is only inspected for an empty elevator
+        if (status == _BOARDING or elevator_state.is_action_in_progress() or
+            (elevator_state.is_empty() and self.no_buttons_pressed())):
             return ()
 
-        if status == ElevatorState.IDLE:
+        if status == _IDLE:
                 # heuristic: prefer to move up
                 if self.is_hall_call(elevator_state.floor, above=True, down_up=True):
-                    return (ElevatorState.MOVE_UP,)
-                return (ElevatorState.MOVE_DOWN,)
+                    return _MOVE_UP_ONLY
+                return _MOVE_DOWN_ONLY
 
-        if status == ElevatorState.DONE_BOARDING:
+        if status == _DONE_BOARDING:
             # not have both passengers going up and down
             num_pass_up = elevator_state.num_passengers_up()
             num_pass_down = elevator_state.num_passengers_down()
             assert num_pass_up * num_pass_down == 0, 'elevator contains passengers going up AND down'
             # has to service car calls in current direction
             if num_pass_down > 0:
-                return (ElevatorState.MOVE_DOWN,)
+                return _MOVE_DOWN_ONLY
             elif num_pass_up > 0:
-                return (ElevatorState.MOVE_UP,)
+                return _MOVE_UP_ONLY
             else:
                 if self.is_hall_call(elevator_state.floor, above=True, down_up=True):
-                    return (ElevatorState.MOVE_UP,)
+                    return _MOVE_UP_ONLY
                 if self.is_hall_call(elevator_state.floor, above=False, down_up=True):
-                    return (ElevatorState.MOVE_DOWN,)
+                    return _MOVE_DOWN_ONLY
             return ()
 
         if elevator_state.is_decision_point(self):
-            if elevator_state.status == ElevatorState.ACCELERATING:
+            if status == _ACCELERATING:
                 amount = 1
-            elif elevator_state.status == ElevatorState.FULL_SPEED:
+            elif status == _FULL_SPEED:
                 amount = 2
-            stop_target = elevator_state.next_floor(self.floors, amount=amount).level
+            # level of next_floor(amount), computed without going through the floor objects
+            stop_target = elevator_state._floor + elevator_state._direction * amount
+            assert 0 <= stop_target < self.num_floors, 'next_floor checked on non-existing floor'
             elevator_state.stop_target = stop_target
             if stop_target == 0 or stop_target == self.num_floors - 1:
                 # cannot go past ground or top floor
-                return (ElevatorState.STOP,)
+                return _STOP_ONLY
             
             # cannot continue if passenger wants to get off at current stop target
-            if stop_target in elevator_state.car_calls():
-                return (ElevatorState.STOP,)
+            if elevator_state.passengers[stop_target]:
+                return _STOP_ONLY
             # no passenger wants to get on or off next floor -> force continue
             # ADJUSTED: SEE WHAT HAPPENS WHEN REMOVING THIS CONSTRAINT
-            if (not elevator_state.is_passenger_next_floor(self.floors, amount=amount) or
+            if (not (<Floor>self.floors[stop_target]).has_passengers() or
                     elevator_state.is_full()):
                 # if elevator_state.is_full():
-                return (ElevatorState.CONTINUE,)
+                return _CONTINUE_ONLY
 
-            return (ElevatorState.STOP, ElevatorState.CONTINUE)
+            return _STOP_OR_CONTINUE
             
         return ()
 
     def process_actions(self, simulator):
+        # events of all elevators are queued together, most steps none are generated
+        pending = []
+        now = simulator.now()
         for elevator in self.elevators:
             possible_actions = self.get_possible_actions(elevator)
 
             # a constrained decision is made
             if len(possible_actions) == 1:
-                simulator.insert(events.ElevatorActionEvent(simulator.now(), elevator, possible_actions[0]))
-                logger.debug('time:%.3f:possible actions: %s', simulator.now(), const.MAP_CONST_STR[possible_actions[0]])
+                pending.append(events.ElevatorActionEvent(now, elevator, possible_actions[0]))
+                logger.debug('time:%.3f:possible actions: %s', now, const.MAP_CONST_STR[possible_actions[0] + 1])
             elif len(possible_actions) == 2:
-                simulator.insert(events.ElevatorControlEvent(simulator.now(), elevator))
-                logger.debug('time:%.3f:possible actions: (%s, %s)', simulator.now(), const.MAP_CONST_STR[possible_actions[0]],
-                             const.MAP_CONST_STR[possible_actions[1]])
+                pending.append(events.ElevatorControlEvent(now, elevator))
+                logger.debug('time:%.3f:possible actions: (%s, %s)', now, const.MAP_CONST_STR[possible_actions[0] + 1],
+                             const.MAP_CONST_STR[possible_actions[1] + 1])
+        if pending:
+            simulator.insert_many(pending)
 
     def complete_actions(self, simulator):
+        # on most steps no elevator has an action to complete
         for elevator in self.elevators:
-            elevator.complete_action(simulator)
-
-    def do_action(self, action, elevator_id=0):
-        """
-        Performs the given action in the current environment state and updates the environment.
-        """
-        self.elevators[elevator_id].do_action(action)
-
-    def reset(self):
-        """
-          Resets the current state to the blank state
-        """
-        init_state = self.get_initial_state()
-        for elevator in self.elevators:
-            elevator.reset(init_state)
-
-        for floor in self.floors:
-            floor.reset()
-
-    def get_initial_state(self):
-        """
-        Return a dictionary containing initial state parameters.
-
-        Returns
-        -------
-        dict
-            containing initial state parameters
-        """
-        return {'start_floor': 0, 'start_direction': ElevatorState.STOPPED, 'capacity': 20,
-                'acc': 0, 'vel': 0, 'pos': 0}
+            if elevator._current_action != _NO_ACTION:
+                elevator.complete_action(simulator)
 
     def update_accumulated_cost(self, simulator, event_time):
         """
@@ -411,10 +534,8 @@ cdef class Environment:
             with open(passenger_datafile, 'a') as f:
                 # if not os.path.isfile(passenger_datafile):
                 #     f.write('episode,waiting_time,boarding_time,system_time,threshold\r\n')
-                avg_waiting = sum([x[0] for x in self.passenger_times]) / len(self.passenger_times)
-                avg_boarding = sum([x[1] for x in self.passenger_times]) / len(self.passenger_times)
-                avg_system = sum([x[2] for x in self.passenger_times]) / len(self.passenger_times)
-                avg_threshold = sum([x[3] for x in self.passenger_times]) / len(self.passenger_times)
+                # column means of all passenger times in a single pass
+                avg_waiting, avg_boarding, avg_system, avg_threshold = np.mean(self.passenger_times, axis=0)
                 csv_writer = csv.writer(f)
                 csv_writer.writerow((self.elevators[0].controller.episodes_so_far, avg_waiting, avg_boarding, avg_system, avg_threshold))
 
@@ -429,6 +550,14 @@ cdef class Environment:
             self.num_floors, self.num_elevators, self.traffic_profile)
 
 
+# thresholds the elevator state compares against every simulation step, with the numerical
+# tolerance already subtracted
+cdef double _ACCEL_DECISION_THRESHOLD = const.ACCEL_DECISION_DIST - const.GENERAL_EPS
+cdef double _FULL_SPEED_DECISION_THRESHOLD = const.FULL_SPEED_DECISION_DIST - const.GENERAL_EPS
+cdef double _MAX_SPEED_THRESHOLD = const.MAX_SPEED - const.GENERAL_EPS
+cdef double _FLOOR_CROSSING_THRESHOLD = const.FLOOR_HEIGHT - const.GENERAL_EPS
+
+
 class ElevatorState(object):
     """
     Represents state of an elevator.
@@ -450,8 +579,8 @@ class ElevatorState(object):
         current action the elevator is taking
     capacity : int
         maximum number of people that can get into the elevator at the same time.
-    passengers : dict
-        dictionary of lists mapping floor to passengers traveling to that floor
+    passengers : list
+        passengers[i] is the list of passengers traveling to floor i
     status : int
         indicate elevator status: accelerating, decelerating, full speed or idle
     motion :
@@ -485,6 +614,11 @@ class ElevatorState(object):
     MOVE_UP = 11
     MOVE_DOWN = 12
 
+    __slots__ = ('id', 'environment', 'controller', '_floor', '_modes', '_direction', '_current_action',
+                 'capacity', 'passengers', '_num_passengers', '_num_passengers_up', '_num_passengers_down',
+                 '_car_call_mask', '_status', 'motion',
+                 'history', 'accelerating_decision_made', 'full_speed_decision_made', 'stop_target')
+
     def __init__(self, environment, controller='BestFirstAgent', floor=0, direction=None, index=0,
                  current_action=None, capacity=20, status=None, acc=0, vel=0, pos=0, history=None, **args):
         self.id = index
@@ -496,11 +630,19 @@ class ElevatorState(object):
         elif controller == 'RandomAgent':
             self.controller = RandomAgent(index=self.id, **args)
         self._floor = floor
+        # status and direction are mirrored in the environment's mode array for the motion step
+        self._modes = environment.elevator_modes
         self.direction = direction if direction else ElevatorState.STOPPED
         self._current_action = current_action if current_action else ElevatorState.NO_ACTION
         self.capacity = capacity
-        self.passengers = {i: [] for i in range(self.environment.num_floors)}
+        self.passengers = [[] for _ in range(self.environment.num_floors)]
+        self._num_passengers = 0
+        self._num_passengers_up = 0
+        self._num_passengers_down = 0
+        # bit i is set if a passenger in the elevator travels to floor i
+        self._car_call_mask = 0
         self._status = status if status else ElevatorState.IDLE
+        self._modes[0, self.id] = self._status
         self.motion = ElevatorMotion(self, acc, vel, pos)
         self.history = history if history else []
         # TODO: UPDATE DECISION TIME WHEN DECISION IS MADE
@@ -515,7 +657,17 @@ class ElevatorState(object):
     @floor.setter
     def floor(self, value):
         self._floor = value
-        logger.info('elevator %d reaches floor %d', self.id, value)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('elevator %d reaches floor %d', self.id, value)
+
+    @property
+    def direction(self):
+        return self._direction
+
+    @direction.setter
+    def direction(self, value):
+        self._direction = value
+        self._modes[1, self.id] = value
 
     @property
     def status(self):
@@ -524,7 +676,9 @@ class ElevatorState(object):
     @status.setter
     def status(self, value):
         self._status = value
-        logger.info('elevator %d status changes to %s', self.id, const.MAP_CONST_STR[value])
+        self._modes[0, self.id] = value
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('elevator %d status changes to %s', self.id, const.MAP_CONST_STR[value + 1])
 
     @property
     def current_action(self):
@@ -533,32 +687,20 @@ class ElevatorState(object):
     @current_action.setter
     def current_action(self, value):
         self._current_action = value
-        logger.info('elevator %d current action changes to %s', self.id, const.MAP_CONST_STR[value])
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('elevator %d current action changes to %s', self.id, const.MAP_CONST_STR[value + 1])
 
     def capacity_left(self):
         """
         Return number of passengers that can still fit in the elevator right now.
         """
-        return self.capacity - self.num_passengers()
+        return self.capacity - self._num_passengers
 
     def is_full(self):
         """
         Return True if number of passengers has reached elevator capacity.
         """
-        return self.capacity_left == 0
-
-    def add_passengers(self, passengers):
-        """
-        Add given group of passengers to elevator
-
-        Parameters
-        ----------
-        passengers : list
-
-        passengers to be added
-        """
-        for passenger in passengers:
-            self.add_passenger(passenger)
+        return self._num_passengers >= self.capacity
 
     def add_passenger(self, passenger, now):
         """
@@ -572,26 +714,66 @@ class ElevatorState(object):
         """
         passenger.enter_elevator(self, now)
 
-    def car_calls(self):
+    def load_passenger(self, passenger):
         """
-        Return remaining car calls in current direction, sorted in increasing floor order.
+        Store passenger that has entered the elevator.
+        """
+        cdef list passengers = self.passengers[passenger.target]
+        passenger.slot = len(passengers)
+        passengers.append(passenger)
+        self._num_passengers += 1
+        self._count_direction(passenger, 1)
+        self._car_call_mask |= 1 << passenger.target
+
+    def unload_passenger(self, passenger):
         """
-        calls = []
+        Remove passenger that has exited the elevator.
 
-        for target_floor, passengers in self.passengers.items():
-            # someone going to that floor
-            if passengers:
-                if ((self.direction == ElevatorState.UP and target_floor > self.floor) or
-                    (self.direction == ElevatorState.DOWN and target_floor < self.floor)):
-                    calls.append(target_floor)
+        The last passenger with the same target takes over the slot of the exiting passenger.
+        """
+        cdef list passengers = self.passengers[passenger.target]
+        last = passengers.pop()
+        if last is not passenger:
+            passengers[passenger.slot] = last
+            last.slot = passenger.slot
+        self._num_passengers -= 1
+        self._count_direction(passenger, -1)
+        if not passengers:
+            self._car_call_mask &= ~(1 << passenger.target)
+
+    def _count_direction(self, passenger, int change):
+        """
+        Add change to the counter of passengers traveling in the direction of passenger.
+        """
+        if passenger.going_up():
+            self._num_passengers_up += change
+        elif passenger.going_down():
+            self._num_passengers_down += change
 
-        return calls
+    def car_calls(self):
+        """
+        Return remaining car calls in current direction, sorted in increasing floor order.
+        """
+        cdef unsigned long long calls = self._car_call_mask
+        cdef int level
+        if self.direction == ElevatorState.UP:
+            calls &= _ABOVE_MASKS[self.floor]
+        elif self.direction == ElevatorState.DOWN:
+            calls &= _BELOW_MASKS[self.floor]
+        else:
+            return []
+        return [level for level in range(self.environment.num_floors) if calls >> level & 1]
 
     def num_car_calls(self):
         """
         Return number of remaining car calls in current direction.
         """
-        return len(self.car_calls())
+        cdef unsigned long long calls = self._car_call_mask
+        if self.direction == ElevatorState.UP:
+            return _popcount(calls & _ABOVE_MASKS[self.floor])
+        if self.direction == ElevatorState.DOWN:
+            return _popcount(calls & _BELOW_MASKS[self.floor])
+        return 0
 
     def is_passenger_next_floor(self, floors, amount=1):
         """
@@ -628,78 +810,64 @@ class ElevatorState(object):
         """
         Return True if elevator reaches decision point.
         """
-        last_floor_pos = environment.floors[self.floor].pos
-        elevator_dist = abs(self.motion.pos - last_floor_pos)
-        return ((self.status == ElevatorState.ACCELERATING and not self.accelerating_decision_made and
-                 elevator_dist >= const.ACCEL_DECISION_DIST - const.GENERAL_EPS) or
-                (self.status == ElevatorState.FULL_SPEED and not self.full_speed_decision_made and
-                 elevator_dist >= const.FULL_SPEED_DECISION_DIST - const.GENERAL_EPS))
+        cdef int status = self._status
+        cdef float elevator_dist = environment.floor_distance(self._floor, self.motion.pos)
+        return ((status == _ACCELERATING and not self.accelerating_decision_made and
+                 elevator_dist >= _ACCEL_DECISION_THRESHOLD) or
+                (status == _FULL_SPEED and not self.full_speed_decision_made and
+                 elevator_dist >= _FULL_SPEED_DECISION_THRESHOLD))
 
     def num_passengers(self):
         """
         Return number of passengers in the elevator.
         """
-        res = 0
-        for _, passengers in self.passengers.items():
-            res += len(passengers)
-
-        return res
+        return self._num_passengers
 
     def num_passengers_up(self):
         """
         Return number of passengers going up in the elevator.
         """
-        res = 0
-        for _, passengers in self.passengers.items():
-            if passengers and passengers[0].going_up(): 
-                res += len(passengers)
-
-        return res
+        return self._num_passengers_up
 
     def num_passengers_down(self):
         """
-        Return number of passengers going up in the elevator.
+        Return number of passengers going down in the elevator.
         """
-        res = 0
-        for _, passengers in self.passengers.items():
-            if passengers and passengers[0].going_down(): 
-                res += len(passengers)
-
-        return res
+        return self._num_passengers_down
 
     def is_empty(self):
         """
         Return True if there are no passengers in the elevator.
         """
-        return self.num_passengers() == 0
+        return self._num_passengers == 0
 
     def passengers_as_list(self):
         """
-        Return list of passengers instead of dict for iteration purposes.
+        Return flat list of passengers instead of per floor lists for iteration purposes.
         """
-        res = []
-        for _, passengers in self.passengers.items():
-            res += passengers
-
-        return res
+        return list(chain.from_iterable(self.passengers))
 
     def update(self, simulator):
         """
-        Update elevator state. Called by the environment every simulator loop.
+        Update elevator state. Called by the environment every simulator loop, after the
+        motion state of all elevators has been advanced.
         """
-        self.motion.update(simulator)
-        if (abs(self.motion.vel) >= const.MAX_SPEED - const.GENERAL_EPS and
-            not (self.status == ElevatorState.FULL_SPEED or
-                 self.status == ElevatorState.FULL_SPEED_DECELERATING)):
-            self.status = ElevatorState.FULL_SPEED
-            self.motion.vel = self.direction * const.MAX_SPEED
+        cdef int status = self._status
+        motion = self.motion
+        if (abs(motion.vel) >= _MAX_SPEED_THRESHOLD and
+            not (status == _FULL_SPEED or status == _FULL_SPEED_DECELERATING)):
+            self.status = status = _FULL_SPEED
+            motion.vel = self._direction * _MAX_SPEED
 
         # update elevator's floor when it crosses the floor
-        if abs(self.motion.pos - simulator.environment.floors[self.floor].pos) >= const.FLOOR_HEIGHT - const.GENERAL_EPS:
-            self.floor = self.next_floor(simulator.environment.floors).level
-            self.motion.pos = simulator.environment.floors[self.floor].pos
+        environment = simulator.environment
+        if environment.floor_distance(self._floor, motion.pos) >= _FLOOR_CROSSING_THRESHOLD:
+            level = self._floor + self._direction
+            assert 0 <= level < environment.num_floors, 'elevator moved past the ground or top floor'
+            self.floor = level
+            motion.pos = environment.floor_positions[self._floor]
             # if no stop action was taken, reset decision made variables
-            if not (self.status == ElevatorState.ACCEL_DECELERATING or self.status == ElevatorState.FULL_SPEED_DECELERATING): 
+            if not (status == _ACCEL_DECELERATING or status == _FULL_SPEED_DECELERATING):
                 self.accelerating_decision_made = False
                 self.full_speed_decision_made = False
 
@@ -714,37 +882,48 @@ class ElevatorState(object):
         """
         self.motion.reference_time = simulator.now()
         self.current_action = action
-        if action == ElevatorState.MOVE_UP:
-            self.direction = ElevatorState.UP
-            self.status = ElevatorState.ACCELERATING
-        elif action == ElevatorState.MOVE_DOWN:
-            self.direction = ElevatorState.DOWN
-            self.status = ElevatorState.ACCELERATING
-        elif action == ElevatorState.STOP:
+        handler = ElevatorState._action_handlers.get(action)
+        if handler is not None:
+            handler(self)
+
+    def _move_up(self):
+        self.direction = ElevatorState.UP
+        self.status = ElevatorState.ACCELERATING
+
+    def _move_down(self):
+        self.direction = ElevatorState.DOWN
+        self.status = ElevatorState.ACCELERATING
+
+    def _stop(self):
+        if logger.isEnabledFor(logging.INFO):
             logger.info('elevator %d plans to stop at floor %d', self.id, self.stop_target)
-            if self.status == ElevatorState.FULL_SPEED:
-                self.status = ElevatorState.FULL_SPEED_DECELERATING
-                self.full_speed_decision_made = True
-            elif self.status == ElevatorState.ACCELERATING:
-                self.status = ElevatorState.ACCEL_DECELERATING
-                self.accelerating_decision_made = True
-        elif self.current_action == ElevatorState.CONTINUE:
-            if self.status == ElevatorState.FULL_SPEED:
-                self.full_speed_decision_made = True
-            elif self.status == ElevatorState.ACCELERATING:
-                self.accelerating_decision_made = True
+        if self.status == ElevatorState.FULL_SPEED:
+            self.status = ElevatorState.FULL_SPEED_DECELERATING
+            self.full_speed_decision_made = True
+        elif self.status == ElevatorState.ACCELERATING:
+            self.status = ElevatorState.ACCEL_DECELERATING
+            self.accelerating_decision_made = True
+
+    def _continue(self):
+        if self.status == ElevatorState.FULL_SPEED:
+            self.full_speed_decision_made = True
+        elif self.status == ElevatorState.ACCELERATING:
+            self.accelerating_decision_made = True
+
+    # maps an action to the method applying it, NO_ACTION has no handler
+    _action_handlers = {MOVE_UP: _move_up, MOVE_DOWN: _move_down, STOP: _stop, CONTINUE: _continue}
 
     def complete_action(self, simulator):
         """
         Complete an action by updating elevator status.
         """
+        cdef int action = self._current_action
         # elevator arrives at floor
-        floor = simulator.environment.floors[self.floor]
-        if self.current_action == ElevatorState.STOP and self.floor == self.stop_target:
-            self.arrive_at_floor(simulator, floor)
-        elif self.current_action == ElevatorState.MOVE_UP or self.current_action == ElevatorState.MOVE_DOWN:
+        if action == _STOP and self._floor == self.stop_target:
+            self.arrive_at_floor(simulator, simulator.environment.floors[self._floor])
+        elif action == _MOVE_UP or action == _MOVE_DOWN:
             self.current_action = ElevatorState.NO_ACTION
-        elif self.current_action == ElevatorState.CONTINUE:
+        elif action == _CONTINUE:
             self.current_action = ElevatorState.NO_ACTION
         
         # TODO: ADD TIME TO BOARD PASSENGERS
@@ -772,7 +951,7 @@ class ElevatorState(object):
         return bool(self.passengers[self.floor])
 
     def is_action_in_progress(self):
-        return self.current_action != ElevatorState.NO_ACTION
+        return self._current_action != _NO_ACTION
 
     def reset(self):
         """
@@ -782,8 +961,14 @@ class ElevatorState(object):
         self.floor = 0
         self.direction = ElevatorState.STOPPED
         self.current_action = ElevatorState.NO_ACTION
-        # dictionary of lists mapping floor to passengers traveling to that floor
-        self.passengers = {i: [] for i in range(self.environment.num_floors)}
+        # lists of passengers traveling to each floor are cleared in place
+        for passengers in self.passengers:
+            passengers.clear()
+        self._num_passengers = 0
+        self._num_passengers_up = 0
+        self._num_passengers_down = 0
+        # bit i is set if a passenger in the elevator travels to floor i
+        self._car_call_mask = 0
         self.status = ElevatorState.IDLE
         # acceleration, velocity and position
         self.motion.acc = 0
@@ -793,18 +978,101 @@ class ElevatorState(object):
         logger.debug('environment reset')
 
     def __repr__(self):
-        return 'ElevatorState(environment, controller={}, floor={}, direction={}, \
-current_action={}, capacity={}, action_in_progress={}, status={}, \
-acc={}, vel={}, pos={}, accelerating_decision_made={}, full_speed_decision_made={})'.format(
-                self.controller, self.floor, const.MAP_CONST_STR[self.direction],
-                const.MAP_CONST_STR[self.current_action], self.capacity, self.is_action_in_progress(),
-                const.MAP_CONST_STR[self.status], self.motion.acc, self.motion.vel,
-                self.motion.pos, self.accelerating_decision_made, self.full_speed_decision_made)
+        str_map = const.MAP_CONST_STR
+        motion = self.motion
+        return (f'ElevatorState(environment, controller={self.controller}, floor={self._floor}, '
+                f'direction={str_map[self._direction + 1]}, '
+                f'current_action={str_map[self._current_action + 1]}, capacity={self.capacity}, '
+                f'action_in_progress={self.is_action_in_progress()}, status={str_map[self._status + 1]}, '
+                f'acc={motion.acc}, vel={motion.vel}, pos={motion.pos}, '
+                f'accelerating_decision_made={self.accelerating_decision_made}, '
+                f'full_speed_decision_made={self.full_speed_decision_made})')
+
+
+# C copies of the elevator status codes and motion constants used by the motion step below and
+# the per-step elevator state checks, so that these do not go through Python attribute lookups
+cdef int _IDLE = ElevatorState.IDLE
+cdef int _BOARDING = ElevatorState.BOARDING
+cdef int _FULL_SPEED = ElevatorState.FULL_SPEED
+cdef int _ACCELERATING = ElevatorState.ACCELERATING
+cdef int _ACCEL_DECELERATING = ElevatorState.ACCEL_DECELERATING
+cdef int _FULL_SPEED_DECELERATING = ElevatorState.FULL_SPEED_DECELERATING
+cdef int _DONE_BOARDING = ElevatorState.DONE_BOARDING
+cdef int _STOP = ElevatorState.STOP
+cdef int _CONTINUE = ElevatorState.CONTINUE
+cdef int _NO_ACTION = ElevatorState.NO_ACTION
+cdef int _MOVE_UP = ElevatorState.MOVE_UP
+cdef int _MOVE_DOWN = ElevatorState.MOVE_DOWN
+cdef double _ACCEL_CONST = const.ACCEL_CONST
+cdef double _MAX_SPEED = const.MAX_SPEED
+# possible action tuples returned by Environment.get_possible_actions, built once
+cdef tuple _MOVE_UP_ONLY = (ElevatorState.MOVE_UP,)
+cdef tuple _MOVE_DOWN_ONLY = (ElevatorState.MOVE_DOWN,)
+cdef tuple _STOP_ONLY = (ElevatorState.STOP,)
+cdef tuple _CONTINUE_ONLY = (ElevatorState.CONTINUE,)
+cdef tuple _STOP_OR_CONTINUE = (ElevatorState.STOP, ElevatorState.CONTINUE)
+# coefficients of the derivative of the decelerating parabola: da(t) = 2*c_1*t + c_2
+cdef double _TWO_ACCEL_DECEL_0 = 2 * const.ACCEL_DECEL[0]
+cdef double _ACCEL_DECEL_1 = const.ACCEL_DECEL[1]
+# cos(ACCEL_CONST * t) at every time step t of an accelerating or decelerating phase, which lasts
+# ACCEL_TIME seconds. times outside of the table fall back to computing the cosine
+cdef double _STEPS_PER_SECOND = const.STEPS_PER_SECOND
+cdef double[::1] _ACCEL_COS = np.cos(
+    const.ACCEL_CONST * np.arange(int(const.ACCEL_TIME * const.STEPS_PER_SECOND) + 2) / const.STEPS_PER_SECOND)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef inline double _accel_cos(float t) noexcept nogil:
+    """
+    Return cos(ACCEL_CONST * t), looked up for t at a whole number of time steps.
+    """
+    cdef int step = <int>(t * _STEPS_PER_SECOND + 0.5)
+    if 0 <= step < _ACCEL_COS.shape[0]:
+        return _ACCEL_COS[step]
+    return cos(_ACCEL_CONST * t)
+
+
+cdef inline float _dacc(int status, float t) noexcept nogil:
+    """
+    Return the derivative of the acceleration at time t after the last action.
+
+    Change in acceleration is approximated: da(t) approx a'(t)dt
+    """
+    if status == _ACCELERATING:
+        return _accel_cos(t)
+    elif status == _ACCEL_DECELERATING:
+        return _TWO_ACCEL_DECEL_0 * t + _ACCEL_DECEL_1
+    elif status == _FULL_SPEED_DECELERATING:
+        return - _accel_cos(t)
+    return 0
+
+
+cdef inline void _motion_step(float *acc, float *vel, float *pos, int status, int direction,
+                              float t, double dt) noexcept nogil:
+    """
+    Advance acceleration, velocity and position of an elevator by a single time step dt.
+    """
+    if status == _IDLE or status == _BOARDING:
+        acc[0] = 0
+        vel[0] = 0
+    elif status == _FULL_SPEED:
+        acc[0] = 0
+        vel[0] = direction * _MAX_SPEED
+    else:
+        acc[0] += direction * (_dacc(status, t) * dt)
+
+    vel[0] += acc[0] * dt
+    pos[0] += vel[0] * dt
 
 
 cdef class ElevatorMotion:
     """
-    Contains information regarding motion of the elevator as well as how to update it.
+    Contains information regarding motion of the elevator.
+
+    The motion state itself is stored in the environment's motion_state array so that all
+    elevators are advanced together by Environment.step_motion. This object is a view on the
+    column belonging to its elevator.
 
     Attributes
     ----------
@@ -819,82 +1087,50 @@ cdef class ElevatorMotion:
     reference_time: float
         time in s which acceleration function evaluates as 0
     """
-    cdef public float acc, vel, pos, reference_time
+    cdef float[:, ::1] state
+    cdef int index
     cdef public object elevator_state
 
     def __init__(self, object elevator_state, float acc=0, float vel=0, float pos=0, float reference_time=0):
         self.elevator_state = elevator_state
+        self.state = elevator_state.environment.motion_state
+        self.index = elevator_state.id
         self.acc = acc
         self.vel = vel
         self.pos = pos
         self.reference_time = reference_time
 
-    cdef dacc(self, object simulator):
-        """
-        Return the change in acceleration for a given timestep.
-
-        The change in acceleration depends on state of the elevator,
-        action taken by the elevator.
-
-        Change in acceleration is approximated: da(t) approx a'(t)dt
-
-        Parameters
-        ----------
-        simulator :
-            simulator object which has information about time and timestep size
-        """
-        cdef float t, res
-        t = simulator.now() - self.reference_time
-
-        if self.elevator_state.status == ElevatorState.ACCELERATING:
-            res = math.cos(const.ACCEL_CONST * t)
-        elif self.elevator_state.status == ElevatorState.ACCEL_DECELERATING:
-            res = (2 * const.ACCEL_DECEL[0] * t + const.ACCEL_DECEL[1])
-        elif self.elevator_state.status == ElevatorState.FULL_SPEED_DECELERATING:
-            res = - math.cos(const.ACCEL_CONST * t)
-        else:
-            return 0
+    @property
+    def acc(self):
+        return self.state[0, self.index]
 
-        return res * simulator.time_step
+    @acc.setter
+    def acc(self, float value):
+        self.state[0, self.index] = value
 
-    def dvel(self, simulator):
-        """
-        Return change of velocity in a single time step.
-        """
-        return self.acc * simulator.time_step
+    @property
+    def vel(self):
+        return self.state[1, self.index]
 
-    # def vel_(self):
-    #     return - 1 / C**2 * (math.cos(C * self.time) - 1)
+    @vel.setter
+    def vel(self, float value):
+        self.state[1, self.index] = value
 
-    def dpos(self, simulator):
-        """
-        Return change of position in a single time step.
-        """
-        return self.vel * simulator.time_step
+    @property
+    def pos(self):
+        return self.state[2, self.index]
 
-    def update(self, simulator):
-        """
-        Update elevator motion state.
-        
-        Acceleration is set to zero if its status is idle or full speed, and if
-        the direction is STOPPED.
-        """
-        if (self.elevator_state.status == ElevatorState.IDLE or
-            self.elevator_state.status == ElevatorState.BOARDING):
-            self.acc = 0
-            self.vel = 0
-        elif self.elevator_state.status == ElevatorState.FULL_SPEED:
-            self.acc = 0
-            self.vel = self.elevator_state.direction * const.MAX_SPEED
-        else:
-            self.acc += self.elevator_state.direction * self.dacc(simulator)
+    @pos.setter
+    def pos(self, float value):
+        self.state[2, self.index] = value
 
-        self.vel += self.dvel(simulator)
-        self.pos += self.dpos(simulator)
+    @property
+    def reference_time(self):
+        return self.state[3, self.index]
 
-        if round(simulator.now(), 2) % 1 == 0:
-            logger.debug('time:%.3f:elevator %d motion - acc:%.3f vel:%.3f pos:%.3f', simulator.now(), self.elevator_state.id,
-                        self.acc, self.vel, self.pos)
+    @reference_time.setter
+    def reference_time(self, float value):
+        self.state[3, self.index] = value
 
     def __repr__(self):
         return 'ElevatorMotion(elevator_state, acc={}, vel={}, pos={}, reference_time={})'.format(
@@ -910,38 +1146,42 @@ cdef class Floor(object):
     level : int
         floor number
     pos : float
-        vertical position in meters
-    passengers_up : list
-        contains passengers on floor going up
-    passengers_down : list
-        contains passengers on floor going down
+        vertical position in meters, stored in the environment's floor position array
+    passengers_up : deque
+        contains passengers on floor going up, in order of arrival
+    passengers_down : deque
+        contains passengers on floor going down, in order of arrival
     up : bool
         up hall button on this floor True if on
     down : bool
         down hall button on this floor True if on
+    environment :
+        environment the floor belongs to, keeps track of the hall buttons of all floors
     """
     cdef public int level
-    cdef public float pos
-    cdef public list passengers_up, passengers_down
+    cdef public object passengers_up, passengers_down
     cdef public bint _up
     cdef public bint _down
-    def __init__(self, int level):
+    cdef Environment environment
+    def __init__(self, int level, Environment environment):
         self.level = level
-        self.pos = const.FLOOR_HEIGHT * self.level
-        self.passengers_up = []
-        self.passengers_down = []
+        self.environment = environment
+        self.passengers_up = deque()
+        self.passengers_down = deque()
         self._up = False
         self._down = False
 
+    @property
+    def pos(self):
+        return self.environment._floor_positions[self.level]
+
     @property
     def up(self):
         return self._up
 
     @up.setter
     def up(self, value):
-        self._up = value
-        msg = 'on' if value else 'off'
-        logger.info('up button on floor %d turns %s', self.level, msg)
+        self._set_button(False, value)
 
     @property
     def down(self):
@@ -949,9 +1189,23 @@ cdef class Floor(object):
     
     @down.setter
     def down(self, value):
-        self._down = value
-        msg = 'on' if value else 'off' 
-        logger.info('down button on floor %d turns %s', self.level, msg)
+        self._set_button(True, value)
+
+    cdef _set_button(self, bint down, bint value):
+        """
+        Set the down or up button and mirror it into the environment's button masks.
+        """
+        cdef bint old
+        if down:
+            old = self._down
+            self._down = value
+        else:
+            old = self._up
+            self._up = value
+        self.environment.set_button(self.level, down, value)
+        if old != value and logger.isEnabledFor(logging.INFO):
+            logger.info('%s button on floor %d turns %s', 'down' if down else 'up', self.level,
+                        'on' if value else 'off')
 
     def add_passenger(self, passenger):
         """
@@ -977,13 +1231,13 @@ cdef class Floor(object):
         all passengers : list
             combined list of down and up passengers, in that order.
         """
-        return self.passengers_down + self.passengers_up
+        return list(chain(self.passengers_down, self.passengers_up))
 
     def num_waiting(self):
         """
         Return number of passengers waiting on the floor
         """
-        return len(self.all_passengers())
+        return len(self.passengers_down) + len(self.passengers_up)
 
     def num_up(self):
         """
@@ -997,8 +1251,11 @@ cdef class Floor(object):
         """
         return len(self.passengers_down)
 
-    def has_passengers(self):
-        return self.num_waiting() > 0
+    cpdef bint has_passengers(self):
+        """
+        Return True if any passenger is waiting on the floor.
+        """
+        return len(self.passengers_down) > 0 or len(self.passengers_up) > 0
 
     cdef update_button(self, int target):
         """
@@ -1016,10 +1273,10 @@ cdef class Floor(object):
             if button is updated by passenger arriving, indicates target floor
         """
         # if no passengers: button - false -> true, if passengers already: true -> true
-        if target < self.level and not self.down:
-            self.down = True
-        elif target > self.level and not self.up:
-            self.up = True
+        if target < self.level and not self._down:
+            self._set_button(down=True, value=True)
+        elif target > self.level and not self._up:
+            self._set_button(down=False, value=True)
 
     def get_buttons(self):
         """
@@ -1030,17 +1287,21 @@ cdef class Floor(object):
         tuple
             state of the down and up buttons in that order
         """
-        return (self.down, self.up)
+        return (self._down, self._up)
 
     def waiting_time(self, object simulator):
         """
         Return sum of passenger waiting times on this floor.
+
+        Passengers on the floor have all arrived by now and are still waiting, so the sum is the
+        number of waiting passengers times the current time minus the sum of their arrival times.
         """
-        cdef float result
-        result = 0
-        for passenger in self.all_passengers():
-            result += passenger.waiting_time(simulator)
-        return result
+        cdef double now = simulator.now()
+        cdef double arrival_time_sum = 0
+        cdef Passenger passenger
+        for passenger in chain(self.passengers_down, self.passengers_up):
+            arrival_time_sum += passenger.arrival_time
+        return now * self.num_waiting() - arrival_time_sum
 
     def board_passengers(self, object simulator, object elevator_state):
         """
@@ -1055,67 +1316,59 @@ cdef class Floor(object):
         cdef int capacity_left, num_up, num_down
         now = simulator.now()
         boarding_time = 1
+        # all transfer events of this stop are queued at once
+        batch = []
         # TODO: WHICH PASSENGER BOARDING DIRECTION DEPENDS ON ELEVATOR PASSENGERS AS WELL
         passengers_off = elevator_state.passengers[elevator_state.floor]
         for passenger in passengers_off:
-            simulator.insert(events.PassengerTransferEvent(now + boarding_time, passenger, elevator_state, to_elevator=False))
+            batch.append(events.PassengerTransferEvent(now + boarding_time, passenger, elevator_state, to_elevator=False))
             boarding_time += 1  # TODO: Make boarding time random variable
         capacity_left = elevator_state.capacity_left() + len(passengers_off)
-        num_up = self.num_up()
-        num_down = self.num_down()
+        num_up = len(self.passengers_up)
+        num_down = len(self.passengers_down)
         passengers_boarding = None
         # TODO: WHEN ELEVATOR REACHES TOP OR BOTTOM FLOOR, CHANGE DIRECTION TO ?STOPPED?
         if elevator_state.direction == ElevatorState.UP:
             if num_up > 0:
-                if capacity_left < num_up:
-                    passengers_boarding = self.passengers_up[:capacity_left]
-                else:
-                    passengers_boarding = self.passengers_up[:]
-                    simulator.environment.floors[elevator_state.floor].up = False
+                passengers_boarding = self._select_boarders(False, capacity_left)
             # elif num_down > 0 and not simulator.environment.is_hall_call(elevator_state.floor, above=True, down_up=True):
             elif num_down > 0 and elevator_state.num_passengers_up() == 0:
-                if capacity_left < num_down:
-                    passengers_boarding = self.passengers_down[:capacity_left]
-                else:
-                    passengers_boarding = self.passengers_down[:]
-                    simulator.environment.floors[elevator_state.floor].down = False
+                passengers_boarding = self._select_boarders(True, capacity_left)
         elif elevator_state.direction == ElevatorState.DOWN:
             if num_down > 0:
-                if capacity_left < num_down:
-                    passengers_boarding = self.passengers_down[:capacity_left]
-                else:
-                    passengers_boarding = self.passengers_down[:]
-                    simulator.environment.floors[elevator_state.floor].down = False
-            elif num_down > 0 and elevator_state.num_passengers_down() == 0:
-                if capacity_left < num_up:
-                    passengers_boarding = self.passengers_up[:capacity_left]
-                else:
-                    passengers_boarding = self.passengers_up[:]
-                    simulator.environment.floors[elevator_state.floor].up = False
+                passengers_boarding = self._select_boarders(True, capacity_left)
+            elif num_up > 0 and elevator_state.num_passengers_down() == 0:
+                passengers_boarding = self._select_boarders(False, capacity_left)
 
         if passengers_boarding:
             for passenger in passengers_boarding:
                 # TODO: time from truncated erlang instead of 1 second
-                simulator.insert(events.PassengerTransferEvent(now + boarding_time, passenger, elevator_state, to_elevator=True))
+                batch.append(events.PassengerTransferEvent(now + boarding_time, passenger, elevator_state, to_elevator=True))
                 boarding_time += 1
-            simulator.insert(events.DoneBoardingEvent(now + boarding_time - 1 + const.GENERAL_EPS, elevator_state))
-        else:
-            simulator.insert(events.DoneBoardingEvent(now + boarding_time - 1, elevator_state))
+        # boarding is done just after the last transfer, so it never ties with it in the queue
+        batch.append(events.DoneBoardingEvent(now + boarding_time - 1 + const.GENERAL_EPS, elevator_state))
+        simulator.insert_many(batch)
 
-    def reset(self):
-        self.passengers_up = []
-        self.passengers_down = []
-        self.up = False
-        self.down = False
+    cdef object _select_boarders(self, bint down, int capacity_left):
+        """
+        Return the first arrived passengers of the down or up queue that fit in the elevator.
 
-    def __lt__(self, other):
-        return self.level < other.level
+        If the whole queue fits, its hall button is turned off and the queue itself is returned
+        rather than a copy. The passengers leave the queue one by one as their transfer events
+        are handled, so it must not be modified before those events are created.
+        """
+        queue = self.passengers_down if down else self.passengers_up
+        if capacity_left < len(queue):
+            return list(islice(queue, capacity_left))
+        self._set_button(down=down, value=False)
+        return queue
 
-    def __gt__(self, other):
-        return self.level > other.level
-    
-    def __eq__(self, other):
-        return self.level == other.level
+    def reset(self):
+        # queues are created once per floor and cleared in place between episodes
+        self.passengers_up.clear()
+        self.passengers_down.clear()
+        self._set_button(down=False, value=False)
+        self._set_button(down=True, value=False)
 
     def __str__(self):
         return '[Level: {}, num waiting: {}]'.format(self.level, self.num_waiting())
@@ -1124,10 +1377,17 @@ cdef class Floor(object):
         return 'Floor(level={})'.format(self.level)
 
 
-class Passenger:
+# number of passengers created so far, used to hand out passenger ids
+cdef int _num_passengers_total = 0
+
+
+cdef class Passenger:
     """
     Represents a passenger.
 
+    Passengers are created on every arrival, so the state is kept in typed
+    fields instead of an instance dictionary.
+
     Parameters
     ----------
     target : int
@@ -1146,26 +1406,31 @@ class Passenger:
         time when the passenger boarded an elevator
     id : int
         unique passenger identifier
+    slot : int
+        index of the passenger among the elevator's passengers with the same target
     """
-    # cdef public int status, target, _id
-    # cdef public float arrival_time, boarded_time
-    # cdef public object floor
-    
+    cdef public int status, id, slot
+    # set through _set_target only, which keeps the cached direction in sync
+    cdef readonly int target
+    # sign of the travel direction, fixed once the target is chosen
+    cdef int _direction
+    cdef public double arrival_time, boarded_time
+    cdef public object floor
+
     WAITING = 0
     BOARDED = 1
 
-    num_passengers_total = 0
-
     def __init__(self, floor, target=None):
         """
         Initialize passenger and immediately handle updating the floor state
         """
-        if target:
-            self.target = target
+        global _num_passengers_total
         self.status = Passenger.WAITING
-        self.id = Passenger.num_passengers_total
-        Passenger.num_passengers_total += 1
+        self.id = _num_passengers_total
+        _num_passengers_total += 1
         self.floor = floor
+        if target:
+            self._set_target(target)
         self.arrival_time = 0
         self.boarded_time = 0
 
@@ -1173,12 +1438,18 @@ class Passenger:
         """
         Passenger chooses a target floor and is added to its arriving floor's queue.
         """
-        logger.info('time:%.3f:passenger %d arrives at floor %d', simulator.now(), self.id, self.floor.level)
         self.arrival_time = simulator.now()
-        self.target = self.choose_target(simulator.environment)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('time:%.3f:passenger %d arrives at floor %d', self.arrival_time, self.id, self.floor.level)
+        self._set_target(self.choose_target(simulator.environment))
         self.floor.add_passenger(self)
 
-    def system_time(self, float t):
+    cdef void _set_target(self, int target):
+        cdef int level = self.floor.level
+        self.target = target
+        self._direction = (target > level) - (target < level)
+
+    def system_time(self, double t):
         """
         Return time passenger has been in system at time t.
         
@@ -1187,9 +1458,9 @@ class Passenger:
         t : float
             time in seconds
         """
-        return (t - self.arrival_time) * (t > self.arrival_time)
+        return t - self.arrival_time if t > self.arrival_time else 0.0
 
-    def waiting_time(self, float t):
+    def waiting_time(self, double t):
         """
         Return time passenger has/had waited for an elevator at time t.
         
@@ -1200,9 +1471,12 @@ class Passenger:
         t : float
             time in seconds
         """
-        return self.system_time(t) - self.boarding_time(t)
+        # a boarded passenger stopped waiting when boarding
+        if self.status == Passenger.BOARDED:
+            t = self.boarded_time
+        return t - self.arrival_time if t > self.arrival_time else 0.0
 
-    def boarding_time(self, float t):
+    def boarding_time(self, double t):
         """
         Return time passenger has been in elevator at time t.
         
@@ -1211,25 +1485,26 @@ class Passenger:
         t : float
             time in seconds
         """
-        return (t - self.boarded_time) * (self.status == Passenger.BOARDED)
+        return t - self.boarded_time if self.status == Passenger.BOARDED else 0.0
 
     def going_up(self):
         """Return True if passenger is going up."""
-        return self.target > self.floor.level
+        return self._direction > 0
 
     def going_down(self):
         """Return True if passenger is going up."""
-        return self.target < self.floor.level
+        return self._direction < 0
     
     def choose_target(self, object environment):
         """
         Return target floor according to current traffic
         """
         target = environment.traffic_profile.choose_target(self.floor)
-        logger.info('passenger %d chooses floor %d', self.id, target)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('passenger %d chooses floor %d', self.id, target)
         return target
 
-    def enter_elevator(self, object elevator_state, float now):
+    def enter_elevator(self, object elevator_state, double now):
         """
         Change state of passenger when entering elevator.
 
@@ -1245,10 +1520,11 @@ class Passenger:
         self.status = Passenger.BOARDED
         self.boarded_time = now
 
-        elevator_state.passengers[self.target].append(self)
-        logger.info('passenger %d enters elevator %d', self.id, elevator_state.id)
+        elevator_state.load_passenger(self)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('passenger %d enters elevator %d', self.id, elevator_state.id)
 
-    def exit_elevator(self, object elevator_state, float now, object environment):
+    def exit_elevator(self, object elevator_state, double now, object environment):
         """
         Remove passenger from elevator and system when exiting elevator.
 
@@ -1257,13 +1533,15 @@ class Passenger:
         elevator_state :
             called by the elevator defined in that elevator state
         """
-        environment.passenger_times.append((self.waiting_time(now), self.boarding_time(now),
-                                            self.system_time(now), self.waiting_time(now) > 60))
+        cdef double waiting_time = self.waiting_time(now)
+        environment.passenger_times.append((waiting_time, self.boarding_time(now),
+                                            self.system_time(now), waiting_time > 60))
         # write waiting time and boarding time to string stream
         # data = (elevator_state.controller.episodes_so_far, self.waiting_time(now),
         #         self.boarding_time(now))
-        elevator_state.passengers[self.target].remove(self)
-        logger.info('passenger %d exits elevator %d', self.id, elevator_state.id)
+        elevator_state.unload_passenger(self)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('passenger %d exits elevator %d', self.id, elevator_state.id)
 
     def update(self):
         pass
@@ -1280,10 +1558,33 @@ class TrafficProfile(ABC):
     ----------
     interfloor : float
         \in [0, 1], percentage of interfloor travel in terms of total arrival rate
+    rng : Generator
+        random generator used for drawing passenger targets and inter-arrival times, seeded
+        with `seed' if given
+    batch_size : int
+        number of random values drawn at once when the values drawn in advance run out
     """
-    def __init__(self, num_floors, interfloor=0):
+    batch_size = 256
+
+    def __init__(self, num_floors, interfloor=0, seed=None):
         self.num_floors = num_floors
         self.interfloor = interfloor
+        self.rng = np.random.default_rng(seed)
+        # unit rate exponential samples drawn in advance
+        self._exponentials = []
+
+    def inter_arrival_time(self, float rate):
+        """
+        Return time until the next arrival of a poisson process with given rate.
+
+        Parameters
+        ----------
+        rate : float
+            mean number of arrivals per time unit
+        """
+        if not self._exponentials:
+            self._exponentials = self.rng.standard_exponential(self.batch_size).tolist()
+        return self._exponentials.pop() / rate
 
     @abstractmethod
     def choose_target(self, passenger):
@@ -1301,20 +1602,49 @@ class DownPeak(TrafficProfile):
     arrival_rates: tuple
         mean number of passengers during a typical afternoon business hour
     """
-    def __init__(self, num_floors, interfloor=0.5):
-        super().__init__(num_floors, interfloor)
+    def __init__(self, num_floors, interfloor=0.5, seed=None):
+        super().__init__(num_floors, interfloor, seed)
         self.target_floor = 0
+        self.arrival_rates = const.DOWNPEAK_RATES
+        # reciprocal of the length of a rate interval in seconds
+        self._rate_interval_inv = 1.0 / (const.SECONDS_PER_MINUTE * const.MINUTES_PER_TIME_INTERVAL)
+        # targets drawn in advance for passengers arriving on floor i
+        self._targets = [[] for _ in range(num_floors)]
 
     def choose_target(self, floor):
-        # with prob `interfloor' choose floor != target else choose target
-        cdef list possible_floors
-        if random.random() < self.interfloor:
-            possible_floors = [pos_floor for pos_floor in range(self.num_floors) if pos_floor not in (0, floor.level)]
-            target = random.choice(possible_floors)
-        else:
-            target = self.target_floor
+        targets = self._targets[floor.level]
+        if not targets:
+            targets.extend(self.choose_targets(np.full(self.batch_size, floor.level)).tolist())
+        return targets.pop()
 
-        return target
+    def choose_targets(self, levels):
+        """
+        Return target floors for passengers arriving on the given floor levels.
+
+        With prob `interfloor' a floor other than the ground floor and the arrival floor is chosen
+        uniformly, the target floor otherwise.
+
+        Parameters
+        ----------
+        levels : ndarray
+            floor levels the passengers arrive on
+
+        Returns
+        -------
+        ndarray
+            target floor of every passenger
+        """
+        targets = np.full(len(levels), self.target_floor, dtype=int)
+        interfloor = self.rng.random(len(levels)) < self.interfloor
+        levels = levels[interfloor]
+        # ground floor and arrival floor are skipped
+        num_options = self.num_floors - 1 - (levels > 0)
+        assert np.all(num_options > 0), \
+            'interfloor passenger has no floor to travel to other than the ground and arrival floor'
+        choices = 1 + (self.rng.random(len(levels)) * num_options).astype(int)
+        choices += (levels > 0) & (choices >= levels)
+        targets[interfloor] = choices
+        return targets
 
     def arrival_rate(self, float time):
         """
@@ -1325,11 +1655,8 @@ class DownPeak(TrafficProfile):
         time : float
             time in seconds after starting simulation
         """
-        cdef float minutes_in
-        cdef int index
-        minutes_in = time / const.SECONDS_PER_MINUTE
-        index = int(minutes_in / const.MINUTES_PER_TIME_INTERVAL)
-        return const.DOWNPEAK_RATES[index]
+        cdef double rate_interval_inv = self._rate_interval_inv
+        return self.arrival_rates[<int>(time * rate_interval_inv)]
 
     def __repr__(self):
         return 'DownPeak(num_floors={}, interfloor={})'.format(self.num_floors, self.interfloor)
@@ -1,6 +1,4 @@
-import random
 from abc import ABC, abstractmethod
-import numpy.random as rnd
 
 import environment as env
 import constants as const
@@ -9,7 +7,11 @@ import constants as const
 class Event(ABC):
     """
     Base class for events happening furing simulation.
+
+    Events are created and queued in large numbers, so they define __slots__.
     """
+    __slots__ = ('time',)
+
     def __init__(self, time):
         self.time = time
 
@@ -28,6 +30,8 @@ class PassengerArrivalEvent(Event):
     """
     Passenger arrives at floor
     """
+    __slots__ = ('floor',)
+
     def __init__(self, time, floor):
         super().__init__(time)
         self.floor = floor
@@ -52,8 +56,9 @@ class PassengerArrivalEvent(Event):
 
         Rate depends on time in-simulation.
         """
-        arrival_rate = simulator.environment.traffic_profile.arrival_rate(simulator.now()) / const.MINUTES_PER_TIME_INTERVAL
-        inter_arrival_time = random.expovariate(arrival_rate) * const.SECONDS_PER_MINUTE
+        traffic_profile = simulator.environment.traffic_profile
+        arrival_rate = traffic_profile.arrival_rate(simulator.now()) / const.MINUTES_PER_TIME_INTERVAL
+        inter_arrival_time = traffic_profile.inter_arrival_time(arrival_rate) * const.SECONDS_PER_MINUTE
         simulator.insert(PassengerArrivalEvent(simulator.now() + inter_arrival_time, self.floor))
 
     def __repr__(self):
@@ -75,6 +80,8 @@ class PassengerTransferEvent(Event):
     to_elevator : bool
         True if passenger is transferred from floor to elevator, False otherwise
     """
+    __slots__ = ('passenger', 'elevator_state', 'to_elevator')
+
     def __init__(self, time, passenger, elevator_state, to_elevator):
         super().__init__(time)
         self.passenger = passenger
@@ -85,9 +92,9 @@ class PassengerTransferEvent(Event):
         # remove passenger from floor
         if self.to_elevator:
             if self.passenger.going_up():
-                self.passenger.floor.passengers_up.pop(0)
+                self.passenger.floor.passengers_up.popleft()
             else:
-                self.passenger.floor.passengers_down.pop(0)
+                self.passenger.floor.passengers_down.popleft()
         
             self.passenger.enter_elevator(self.elevator_state, simulator.now())
         # self.passenger.floor.passengers
@@ -103,6 +110,8 @@ class PassengerTransferEvent(Event):
 
 
 class DoneBoardingEvent(Event):
+    __slots__ = ('elevator_state',)
+
     def __init__(self, time, elevator_state):
         super().__init__(time)
         self.elevator_state = elevator_state
@@ -127,6 +136,8 @@ class ElevatorActionEvent(Event):
     If the elevator action is not constrained i.e. the elevator needs to make a decision,
     an ElevatorControlEvent is scheduled
     """
+    __slots__ = ('elevator_state', 'action')
+
     def __init__(self, time, elevator_state, action):
         super().__init__(time)
         self.elevator_state = elevator_state
@@ -138,7 +149,7 @@ class ElevatorActionEvent(Event):
         self.elevator_state.do_action(simulator, self.action)
 
     def __repr__(self):
-        return 'ElevatorActionEvent(time={}, elevator_state={}, action={})'.format(self.time, self.elevator_state, const.MAP_CONST_STR[self.action])
+        return 'ElevatorActionEvent(time={}, elevator_state={}, action={})'.format(self.time, self.elevator_state, const.MAP_CONST_STR[self.action + 1])
 
 
 class ElevatorControlEvent(Event):
@@ -147,6 +158,8 @@ class ElevatorControlEvent(Event):
 
     Once a decision is returned by the controller, generates an ElevatorActionEvent
     """
+    __slots__ = ('elevator_state',)
+
     def __init__(self, time, elevator_state):
         super().__init__(time)
         self.elevator_state = elevator_state
@@ -13,7 +13,7 @@ import constants as const
 from learningAgents import ReinforcementAgent
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+logger.setLevel(logging.WARNING if const.FAST_SIM else logging.DEBUG)
 formatter = logging.Formatter('%(levelname)s:%(name)s:%(message)s')
 file_handler = logging.FileHandler(join(const.LOG_DIR, 'learning.log'), mode='w')
 file_handler.setLevel(logging.DEBUG)
@@ -28,6 +28,8 @@ class QLearningAgent(ReinforcementAgent):
     def __init__(self, **args):
         "You can initialize Q-values here..."
         ReinforcementAgent.__init__(self, **args)
+        # the legal actions do not depend on the state, so the tuple is only built once
+        self.possible_actions = (env.ElevatorState.STOP, env.ElevatorState.CONTINUE)
         args['q_file'] = args['q_file'] + '_' + str(self.num_training) + '.pkl'
         if args['use_q_file'] and os.path.isfile(args['q_file']):
             with open(args['q_file'], 'rb') as q_file:
@@ -53,7 +55,7 @@ class QLearningAgent(ReinforcementAgent):
           there are no legal actions, which is the case at the
           terminal state, you should return a value of 0.0.
         """
-        possible_actions = (env.ElevatorState.STOP, env.ElevatorState.CONTINUE)
+        possible_actions = self.possible_actions
         return min([self.get_qvalue(state, action) for action in possible_actions])
 
     def compute_action_from_qvalues(self, learning_state):
@@ -76,7 +78,7 @@ class QLearningAgent(ReinforcementAgent):
                 - current position (floor) of the elevator
                 - current direction of the elevator
         """
-        possible_actions = (env.ElevatorState.STOP, env.ElevatorState.CONTINUE)
+        possible_actions = self.possible_actions
         qvalues = [self.get_qvalue(learning_state, action) for action in possible_actions]
         
         # there are ties -> choose randomly
@@ -94,13 +96,14 @@ class QLearningAgent(ReinforcementAgent):
         If in training, will choose actions according to boltzmann distribution on
         q values to keep exploring. Otherwise take actions with highest q value.
         """
-        possible_actions = (env.ElevatorState.STOP, env.ElevatorState.CONTINUE)
+        possible_actions = self.possible_actions
         qvalues = [self.get_qvalue(learning_state, action) for action in possible_actions]
 
         if self.is_training:
             prob_stop = self.prob_stop(qvalues, self.temperature())
-            logger.info('state:{}:qvalues(stop,continue):{}:temperature:{}:prob_stop:{}'.format(
-                        learning_state, qvalues, self.temperature(), prob_stop))
+            if logger.isEnabledFor(logging.INFO):
+                logger.info('state:%s:qvalues(stop,continue):%s:temperature:%s:prob_stop:%s',
+                            learning_state, qvalues, self.temperature(), prob_stop)
             if random.random() < prob_stop:
                 return env.ElevatorState.STOP
             return env.ElevatorState.CONTINUE
@@ -225,7 +228,8 @@ class ElevatorQAgent(QLearningAgent):
             result += (part_0 - part_1) * 10e-6
 
         self.cost_accumulator += result
-        logger.info('elevator %d cost accumulator set to %.3f', self.index, self.cost_accumulator)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('elevator %d cost accumulator set to %.3f', self.index, self.cost_accumulator)
 
     def update(self, now, next_state, reward):
         """
@@ -236,7 +240,7 @@ class ElevatorQAgent(QLearningAgent):
         NOTE: You should never call this function,
         it will be called on your behalf
         """
-        possible_actions = (env.ElevatorState.STOP, env.ElevatorState.CONTINUE)
+        possible_actions = self.possible_actions
         min_next_q = min([self.get_qvalue(next_state, action) for action in possible_actions])
 
         sample = reward + math.exp(-self.beta * (now - self.decision_time)) * min_next_q
@@ -244,5 +248,6 @@ class ElevatorQAgent(QLearningAgent):
         self.qvalues[(self.last_state, self.last_action)] = ((1 - self.alpha()) * self.get_qvalue(self.last_state, self.last_action) +
                                                              self.alpha() * sample)
         new = self.qvalues[(self.last_state, self.last_action)] 
-        logger.info('time:%.2f:state:%s:action:%s:reward:%.3f:original_q:%.3f:target:%.3f:new_q:%.3f',
-                    now, self.last_state, self.last_action, reward, orig, sample, new)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info('time:%.2f:state:%s:action:%s:reward:%.3f:original_q:%.3f:target:%.3f:new_q:%.3f',
+                        now, self.last_state, self.last_action, reward, orig, sample, new)
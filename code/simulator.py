@@ -1,8 +1,8 @@
 import pyximport; pyximport.install()
 import heapq
 import logging
+import math
 import configparser  # parse configuration files
-import numpy.random as rnd
 import os
 import random
 import time
@@ -15,7 +15,8 @@ import learningAgents
 from environment import Environment, Floor, ElevatorState, Passenger
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+# the file handler only writes warnings, so info records would be created just to be dropped
+logger.setLevel(logging.WARNING)
 formatter = logging.Formatter('%(levelname)s:%(name)s:%(message)s')
 file_handler = logging.FileHandler(join(const.LOG_DIR, 'simulator.log'), mode='w')
 file_handler.setLevel(logging.WARNING)
@@ -33,6 +34,8 @@ class Simulator:
         time progress every loop (in seconds)
     time : float
         total time that has passed after starting the simulation (in seconds)
+    ticks : int
+        number of time steps taken since the start of the simulation
     events :
         list that keeps track of events in the simulation. implemented as priorityqueue, priority being time.
     seed :
@@ -45,6 +48,7 @@ class Simulator:
     def __init__(self, max_time=60 * 60, **args):
         self.time_step = const.TIME_STEP
         self.time = 0
+        self.ticks = 0
         self.events = []
         self.max_time = max_time
         if args['use_seed']:
@@ -72,6 +76,29 @@ class Simulator:
         heapq.heappush(self.events, event)
         logger.info('%s inserted.', event)
 
+    def insert_many(self, events):
+        """
+        Insert a batch of events into queue.
+
+        Large batches are appended and the heap order is restored once, small ones are pushed
+        one by one.
+
+        Parameters
+        ----------
+        events : list
+            event objects
+        """
+        queue = self.events
+        if len(events) > math.log2(len(queue) + 1):
+            queue.extend(events)
+            heapq.heapify(queue)
+        else:
+            for event in events:
+                heapq.heappush(queue, event)
+        if logger.isEnabledFor(logging.INFO):
+            for event in events:
+                logger.info('%s inserted.', event)
+
     def now(self):
         """Return current running time."""
         return self.time
@@ -81,6 +108,7 @@ class Simulator:
         Update simulator time.
         """
         self.time = self.time + self.time_step
+        self.ticks += 1
         logger.debug('step:new time:%.3f', self.time)
 
     def run(self):
@@ -108,24 +136,31 @@ class Simulator:
         steps : int
             number of timesteps to simulate
         """
+        # bound methods are looked up once instead of every step
+        environment = self.environment
+        step, process_events = self.step, self.process_events
+        update, process_actions = environment.update, environment.process_actions
+        complete_actions = environment.complete_actions
         for _ in range(steps):
-            self.step()
-            self.environment.update(self)
-            self.environment.process_actions(self)
-            # self.environment.observe(self)
-            self.process_events()
-            self.environment.complete_actions(self)
+            step()
+            update(self)
+            process_actions(self)
+            process_events()
+            complete_actions(self)
 
     def process_events(self):
         """
         Process events that need to be processed.
         """
+        queue, now, eps = self.events, self.time, const.GENERAL_EPS
+        log_events = logger.isEnabledFor(logging.INFO)
         try:
-            while self.time >= self.events[0].time - const.GENERAL_EPS:
+            while now >= queue[0].time - eps:
                 # handle event
-                event = heapq.heappop(self.events)
+                event = heapq.heappop(queue)
                 event.execute(self)
-                logger.info('%s handled.', event)
+                if log_events:
+                    logger.info('%s handled.', event)
         # no events in queue
         except IndexError:
             pass
@@ -143,6 +178,7 @@ class Simulator:
         Reset simulator time and events.
         """
         self.time = 0
+        self.ticks = 0
         self.events = []
 
 
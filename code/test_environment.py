@@ -0,0 +1,76 @@
+"""
+Regression tests for the elevator environment.
+
+Run from this directory with `python -m unittest test_environment'.
+"""
+import os
+import unittest
+
+import constants as const
+
+# the simulation modules log to files in the log directory on import
+os.makedirs(const.LOG_DIR, exist_ok=True)
+
+# simulator installs pyximport, which is needed to import the environment
+import simulator
+import events
+from environment import ElevatorState, Passenger
+
+
+def make_simulator():
+    """
+    Return a seeded single elevator simulator built from the default configuration.
+    """
+    args = simulator.parse_config('config.ini')
+    args.update(write_files=False, verbose=False, stats_file='test', use_seed=True, use_q_file=False)
+    return simulator.Simulator(**args)
+
+
+class TestBoardPassengers(unittest.TestCase):
+    def test_descending_elevator_boards_up_passengers(self):
+        sim = make_simulator()
+        environment = sim.environment
+        elevator_state = environment.elevators[0]
+        floor = environment.floors[2]
+        elevator_state.floor = floor.level
+        elevator_state.direction = ElevatorState.DOWN
+        passengers = [Passenger(floor, target=4), Passenger(floor, target=3)]
+        for passenger in passengers:
+            floor.add_passenger(passenger)
+
+        floor.board_passengers(sim, elevator_state)
+
+        boarding = [event.passenger for event in sim.events
+                    if isinstance(event, events.PassengerTransferEvent) and event.to_elevator]
+        self.assertCountEqual(boarding, passengers)
+        self.assertFalse(floor.up)
+
+
+class TestElevatorCapacity(unittest.TestCase):
+    def test_is_full_at_capacity(self):
+        sim = make_simulator()
+        elevator_state = sim.environment.elevators[0]
+        floor = sim.environment.floors[0]
+        for _ in range(elevator_state.capacity - 1):
+            elevator_state.load_passenger(Passenger(floor, target=3))
+        self.assertFalse(elevator_state.is_full())
+
+        elevator_state.load_passenger(Passenger(floor, target=3))
+        self.assertTrue(elevator_state.is_full())
+
+
+class TestFloorWaitingTime(unittest.TestCase):
+    def test_waiting_time_sums_waiting_passengers(self):
+        sim = make_simulator()
+        floor = sim.environment.floors[3]
+        for arrival_time, target in ((0, 1), (2, 4)):
+            passenger = Passenger(floor, target=target)
+            passenger.arrival_time = arrival_time
+            floor.add_passenger(passenger)
+        sim.time = 5
+
+        self.assertAlmostEqual(floor.waiting_time(sim), (5 - 0) + (5 - 2))
+
+
+if __name__ == '__main__':
+    unittest.main()